@@ -1,19 +1,52 @@
 import sys
 import os
+import threading
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 
 import logging
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout, 
-                            QHBoxLayout, QWidget, QFrame, QPushButton, QComboBox)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QThread, pyqtSlot
-from PyQt5.QtGui import QFont, QPalette, QColor
-from model import ContinuousTranscriber  # Your existing model
+                            QHBoxLayout, QWidget, QFrame, QPushButton, QComboBox,
+                            QPlainTextEdit)
+from PyQt5.QtCore import (Qt, QTimer, pyqtSignal, QObject, QThread, pyqtSlot,
+                          QMetaObject)
+from PyQt5.QtGui import QTextCursor
 
+# Keep third-party libraries quiet; our own modules log at INFO
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.WARNING,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Cyberpunk neon theme, read once at import
+_STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'resources', 'cyber.qss')
+with open(_STYLESHEET_PATH, encoding='utf-8') as f:
+    _STYLESHEET = f.read()
+
+# Placeholders shown while a caption or its translation is missing
+_LISTENING_TEXT = "🎤 Listening..."
+_TRANSLATING_TEXT = "🌍 Translating..."
+
+# Shared transcriber so the speech model is loaded once per process
+_transcriber_instance = None
+_transcriber_lock = threading.Lock()
+
+
+def get_transcriber(target_language='en'):
+    """Return the shared ContinuousTranscriber, creating it if needed"""
+    global _transcriber_instance
+    # Imported here so torch/faster-whisper load only when capture starts
+    from model import ContinuousTranscriber
+
+    with _transcriber_lock:
+        if _transcriber_instance is None:
+            _transcriber_instance = ContinuousTranscriber(target_language=target_language)
+        else:
+            # Keep the loaded Whisper model; only the translator changes
+            _transcriber_instance.set_target_language(target_language)
+        return _transcriber_instance
 
 # Worker thread for transcription (from window.py)
 class TranscriptionWorker(QObject):
@@ -21,42 +54,97 @@ class TranscriptionWorker(QObject):
     status = pyqtSignal(str)
     error = pyqtSignal(str)
 
+    # Internal: tells the worker thread that an update is waiting to be flushed
+    _pending_ready = pyqtSignal()
+
+    # Coalescing window for transcription updates (ms)
+    COALESCE_INTERVAL = 40
+
     def __init__(self):
         super().__init__()
         self.transcriber = None
         self.running = False
 
+        # Latest (transcription, translation) pair not yet emitted
+        self._pending = None
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+
+    @pyqtSlot()
+    def setup(self):
+        """Create the coalescing timer; runs on the worker thread once it starts"""
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.COALESCE_INTERVAL)
+        self._flush_timer.timeout.connect(self._flush_pending)
+        self._pending_ready.connect(self._schedule_flush, Qt.QueuedConnection)
+
     @pyqtSlot(str)
     def start(self, target_language='en'):
         try:
             if self.transcriber:
                 self.stop()
             
-            self.status.emit(f"🎤 Listening → {target_language}")
-            self.transcriber = ContinuousTranscriber(target_language=target_language)
+            self.status.emit("⏳ Loading model...")
+            self.transcriber = get_transcriber(target_language)
             self.transcriber.set_callback(self.callback)
             self.transcriber.start_transcription()
             self.running = True
+            self.status.emit(f"🎤 Listening → {target_language}")
         except Exception as e:
             self.error.emit(str(e))
 
     def callback(self, transcription, translation):
         """Called by ContinuousTranscriber with real-time results"""
-        if transcription or translation:
-            self.translation_ready.emit(
-                transcription or "🎤 Listening...",
-                translation or "🌍 Translating..."
-            )
+        if not (transcription or translation):
+            return
+
+        # Keep only the latest pair; the flush timer emits it once per window
+        with self._pending_lock:
+            schedule = self._pending is None
+            self._pending = (transcription or _LISTENING_TEXT,
+                             translation or _TRANSLATING_TEXT)
+        if schedule:
+            self._pending_ready.emit()
+
+    @pyqtSlot()
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    @pyqtSlot()
+    def _flush_pending(self):
+        """Emit the most recent pending update, if any"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending:
+            self.translation_ready.emit(*pending)
 
     @pyqtSlot()
     def stop(self):
         if self.transcriber:
             self.transcriber.stop_transcription()
             self.transcriber = None
+        with self._pending_lock:
+            self._pending = None
         self.running = False
         self.status.emit("⏸ Idle")
 
+    @pyqtSlot()
+    def shutdown(self):
+        """Stop capture and end the worker thread's event loop"""
+        self.stop()
+        QThread.currentThread().quit()
+
 class AllInOneCaptionWindow(QMainWindow):
+    # Queued requests to the worker so model loading runs on its thread
+    start_requested = pyqtSignal(str)
+    stop_requested = pyqtSignal()
+
+    # Typing animation: tick interval (ms) and ticks per full string
+    TYPING_INTERVAL = 25
+    TYPING_TICKS = 20
+
     def __init__(self):
         super().__init__()
         
@@ -64,15 +152,19 @@ class AllInOneCaptionWindow(QMainWindow):
         self.thread = QThread()
         self.worker = TranscriptionWorker()
         self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.setup)
         self.thread.start()
-        
+        self._closing = False  # shutdown has been queued to the worker
+
         # Typing animation (from window.py)
-        self.typing_timer = QTimer(self)
-        self.typing_timer.timeout.connect(self.type_effect)
+        # Ticks are chained single-shots, scheduled only while text remains
+        self._typing_scheduled = False
         self.full_transcription = ""
         self.full_translation = ""
-        self.shown_transcription = ""
-        self.shown_translation = ""
+        self.transcription_pos = 0
+        self.translation_pos = 0
+        self.transcription_step = 1
+        self.translation_step = 1
         
         self.initUI()
         self.connectSignals()
@@ -83,98 +175,7 @@ class AllInOneCaptionWindow(QMainWindow):
         self.setGeometry(300, 300, 900, 400)
         self.setMinimumSize(900, 400)
 
-        # Cyberpunk neon theme (from caption_window.py)
-        self.setStyleSheet("""
-            QMainWindow {
-                background: #0a0e27;
-            }
-            QFrame#headerFrame {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #ff00cc, stop:1 #333399);
-                border: none;
-                border-bottom: 2px solid #00ffff;
-            }
-            QFrame#transcriptFrame {
-                background: #14182f;
-                border: 2px solid #00ffff;
-                border-radius: 15px;
-            }
-            QFrame#translationFrame {
-                background: #14182f;
-                border: 2px solid #ff00cc;
-                border-radius: 15px;
-            }
-            QLabel#headerLabel {
-                color: white;
-                font-size: 24px;
-                font-weight: bold;
-                font-family: 'Courier New';
-                padding: 10px;
-                background: transparent;
-            }
-            QLabel#transcriptHeader {
-                color: #00ffff;
-                font-size: 16px;
-                font-weight: bold;
-                letter-spacing: 2px;
-                font-family: 'Courier New';
-                background: transparent;
-            }
-            QLabel#translationHeader {
-                color: #ff00cc;
-                font-size: 16px;
-                font-weight: bold;
-                letter-spacing: 2px;
-                font-family: 'Courier New';
-                background: transparent;
-            }
-            QLabel#transcriptContent {
-                background: #0f1329;
-                color: #00ffff;
-                font-size: 18px;
-                font-family: 'Courier New';
-                border: 1px solid #00ffff;
-                border-radius: 10px;
-                padding: 20px;
-                min-height: 80px;
-            }
-            QLabel#translationContent {
-                background: #0f1329;
-                color: #ff00cc;
-                font-size: 18px;
-                font-family: 'Courier New';
-                border: 1px solid #ff00cc;
-                border-radius: 10px;
-                padding: 20px;
-                min-height: 80px;
-            }
-            QLabel#statusLabel {
-                color: #00ff00;
-                font-size: 12px;
-                font-family: 'Courier New';
-                background: #1a1f3a;
-                border: 1px solid #00ff00;
-                border-radius: 12px;
-                padding: 5px 15px;
-            }
-            QComboBox, QPushButton {
-                background: #14182f;
-                color: #00ffff;
-                border: 2px solid #00ffff;
-                border-radius: 8px;
-                padding: 8px;
-                font-family: 'Courier New';
-                font-weight: bold;
-                min-width: 120px;
-            }
-            QPushButton:hover {
-                background: #00ffff;
-                color: #0a0e27;
-            }
-            QComboBox:hover {
-                border-color: #ff00cc;
-            }
-        """)
+        self.setStyleSheet(_STYLESHEET)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -204,8 +205,9 @@ class AllInOneCaptionWindow(QMainWindow):
             'English': 'en', 'Spanish': 'es', 'French': 'fr', 
             'German': 'de', 'Japanese': 'ja', 'Chinese': 'zh'
         }
-        for lang in languages.keys():
-            self.lang_combo.addItem(f"🌐 {lang}", languages[lang])
+        # Populate in one call; codes are kept in a parallel list by index
+        self._lang_codes = list(languages.values())
+        self.lang_combo.addItems([f"🌐 {lang}" for lang in languages])
         
         # Start/Stop button
         self.toggle_btn = QPushButton("▶ START CAPTURE")
@@ -231,13 +233,11 @@ class AllInOneCaptionWindow(QMainWindow):
         transcript_header.setObjectName("transcriptHeader")
         transcript_header.setAlignment(Qt.AlignCenter)
 
-        self.transcription_label = QLabel('💬 Click START to begin...')
-        self.transcription_label.setObjectName("transcriptContent")
-        self.transcription_label.setWordWrap(True)
-        self.transcription_label.setAlignment(Qt.AlignCenter)
+        self.transcription_view = self._create_caption_view(
+            "transcriptContent", '💬 Click START to begin...')
 
         transcript_layout.addWidget(transcript_header)
-        transcript_layout.addWidget(self.transcription_label)
+        transcript_layout.addWidget(self.transcription_view)
 
         # Translation panel
         translation_panel = QFrame()
@@ -249,13 +249,11 @@ class AllInOneCaptionWindow(QMainWindow):
         translation_header.setObjectName("translationHeader")
         translation_header.setAlignment(Qt.AlignCenter)
 
-        self.translation_label = QLabel('🌐 Select language...')
-        self.translation_label.setObjectName("translationContent")
-        self.translation_label.setWordWrap(True)
-        self.translation_label.setAlignment(Qt.AlignCenter)
+        self.translation_view = self._create_caption_view(
+            "translationContent", '🌐 Select language...')
 
         translation_layout.addWidget(translation_header)
-        translation_layout.addWidget(self.translation_label)
+        translation_layout.addWidget(self.translation_view)
 
         content_layout.addWidget(transcript_panel, 1)
         content_layout.addWidget(translation_panel, 1)
@@ -281,66 +279,153 @@ class AllInOneCaptionWindow(QMainWindow):
         # Window properties
         self.setWindowFlags(Qt.WindowStaysOnTopHint)
 
+    def _create_caption_view(self, object_name, text):
+        """Read-only caption box; QPlainTextEdit lays out appended text
+        incrementally instead of rewrapping the whole string like QLabel"""
+        view = QPlainTextEdit()
+        view.setObjectName(object_name)
+        view.setReadOnly(True)
+        view.setFrameStyle(QFrame.NoFrame)
+        option = view.document().defaultTextOption()
+        option.setAlignment(Qt.AlignCenter)
+        view.document().setDefaultTextOption(option)
+        view.setPlainText(text)
+        return view
+
     def connectSignals(self):
         """Connect all signals and slots"""
-        self.toggle_btn.toggled.connect(self.toggle_capture)
-        self.worker.translation_ready.connect(self.start_typing_animation)
-        self.worker.status.connect(self.status_label.setText)
-        self.worker.error.connect(self.show_error)
-
+        self.toggle_btn.toggled.connect(self.toggle_capture, Qt.DirectConnection)
+        self.start_requested.connect(self.worker.start, Qt.QueuedConnection)
+        self.stop_requested.connect(self.worker.stop, Qt.QueuedConnection)
+        self.worker.translation_ready.connect(self.start_typing_animation, Qt.QueuedConnection)
+        self.worker.status.connect(self.set_status, Qt.QueuedConnection)
+        self.worker.error.connect(self.show_error, Qt.QueuedConnection)
+
+    @pyqtSlot(bool)
     def toggle_capture(self, checked):
         """Start or stop transcription"""
         if checked:
             self.toggle_btn.setText("⏹ STOP CAPTURE")
-            target_lang = self.lang_combo.currentData()
-            QTimer.singleShot(0, lambda: self.worker.start(target_lang))
-            self.transcription_label.setText("🎤 Listening...")
-            self.translation_label.setText("🌍 Translating...")
+            target_lang = self._lang_codes[self.lang_combo.currentIndex()]
+            self.start_requested.emit(target_lang)
+            self._reset_typing()
+            self.transcription_view.setPlainText(_LISTENING_TEXT)
+            self.translation_view.setPlainText(_TRANSLATING_TEXT)
         else:
             self.toggle_btn.setText("▶ START CAPTURE")
-            QTimer.singleShot(0, self.worker.stop)
-            self.transcription_label.setText("💬 Capture stopped")
-            self.translation_label.setText("🌐 Select language...")
+            self.stop_requested.emit()
+            self._reset_typing()
+            self.transcription_view.setPlainText("💬 Capture stopped")
+            self.translation_view.setPlainText("🌐 Select language...")
 
+    @pyqtSlot(str, str)
     def start_typing_animation(self, transcription, translation):
         """Prepare for typing animation"""
+        # Text that extends the current caption keeps its cursor, so only
+        # the new suffix is animated; anything else restarts from scratch
+        self.transcription_pos = self._resume_position(
+            self.transcription_view, self.full_transcription,
+            transcription, self.transcription_pos)
+        self.translation_pos = self._resume_position(
+            self.translation_view, self.full_translation,
+            translation, self.translation_pos)
         self.full_transcription = transcription
         self.full_translation = translation
-        self.shown_transcription = ""
-        self.shown_translation = ""
-        self.typing_timer.start(15)
+        # Reveal several characters per tick so the remaining text finishes
+        # in roughly TYPING_TICKS ticks regardless of its length
+        remaining = len(transcription) - self.transcription_pos
+        self.transcription_step = max(1, remaining // self.TYPING_TICKS)
+        remaining = len(translation) - self.translation_pos
+        self.translation_step = max(1, remaining // self.TYPING_TICKS)
+        self._schedule_typing()
+
+    def _schedule_typing(self):
+        """Queue the next animation tick unless one is already pending"""
+        if not self._typing_scheduled:
+            self._typing_scheduled = True
+            QTimer.singleShot(self.TYPING_INTERVAL, self.type_effect)
+
+    def _resume_position(self, view, current, new, pos):
+        """Return where typing of `new` should resume, clearing the view on restart"""
+        if current and new.startswith(current):
+            return pos
+        view.clear()
+        return 0
+
+    def _reset_typing(self):
+        """Forget the caption being typed; a pending tick then finds nothing to do"""
+        self.full_transcription = ""
+        self.full_translation = ""
+        self.transcription_pos = 0
+        self.translation_pos = 0
 
+    def _append_caption(self, view, text):
+        """Append text to the end of a caption view"""
+        view.moveCursor(QTextCursor.End)
+        view.insertPlainText(text)
+
+    @pyqtSlot()
     def type_effect(self):
         """Animate text appearing (from window.py)"""
+        self._typing_scheduled = False
+
         # Update transcription
-        if len(self.shown_transcription) < len(self.full_transcription):
-            self.shown_transcription += self.full_transcription[len(self.shown_transcription)]
-            self.transcription_label.setText(self.shown_transcription)
+        full = self.full_transcription
+        pos = self.transcription_pos
+        if pos < len(full):
+            self.transcription_pos = min(len(full), pos + self.transcription_step)
+            self._append_caption(self.transcription_view, full[pos:self.transcription_pos])
+            pos = self.transcription_pos
+        transcription_done = pos >= len(full)
         
         # Update translation
-        if len(self.shown_translation) < len(self.full_translation):
-            self.shown_translation += self.full_translation[len(self.shown_translation)]
-            self.translation_label.setText(self.shown_translation)
+        full = self.full_translation
+        pos = self.translation_pos
+        if pos < len(full):
+            self.translation_pos = min(len(full), pos + self.translation_step)
+            self._append_caption(self.translation_view, full[pos:self.translation_pos])
+            pos = self.translation_pos
         
-        # Stop timer when both are complete
-        if (len(self.shown_transcription) >= len(self.full_transcription) and 
-            len(self.shown_translation) >= len(self.full_translation)):
-            self.typing_timer.stop()
+        # Keep ticking until both are complete
+        if not (transcription_done and pos >= len(full)):
+            self._schedule_typing()
+
+    @pyqtSlot(str)
+    def set_status(self, text):
+        """Update the status label, skipping no-op updates"""
+        if self.status_label.text() != text:
+            self.status_label.setText(text)
 
+    @pyqtSlot(str)
     def show_error(self, msg):
         """Show error in status"""
         self.status_label.setText(f"🔴 ERROR: {msg[:30]}...")
 
     def closeEvent(self, event):
         """Clean shutdown"""
-        self.worker.stop()
-        self.thread.quit()
-        self.thread.wait(2000)
+        if self.thread.isRunning():
+            if not self._closing:
+                # Stop on the worker's own thread, after any queued start/stop,
+                # and close again once its event loop has quit
+                self._closing = True
+                self.thread.finished.connect(self.close, Qt.QueuedConnection)
+                QMetaObject.invokeMethod(self.worker, 'shutdown', Qt.QueuedConnection)
+            # Don't block the GUI on a model load or stop_transcription; the
+            # short wait only covers a thread that is already finishing
+            # (finished is emitted just before isRunning turns False)
+            if not self.thread.wait(100):
+                # Never let the QThread be destroyed while it still runs
+                self.hide()
+                event.ignore()
+                return
         event.accept()
 
 def run():
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')
+    # Reuse a running application (tests, repeated launches) and style it once
+    app = QApplication.instance() or QApplication(sys.argv)
+    if not getattr(app, '_styled', False):
+        app.setStyle('Fusion')
+        app._styled = True
     window = AllInOneCaptionWindow()
     window.show()
     sys.exit(app.exec_())
@@ -1,33 +1,91 @@
+import os
+
+def _cpu_threads():
+    """Thread budget shared by Whisper, the translator and the BLAS/OpenMP
+    pools: one per physical core this process may run on, never fewer than
+    the previous fixed 4 when that many CPUs are usable."""
+    try:
+        usable = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        usable = os.cpu_count() or 1
+    
+    cores = usable
+    # Halve only when the kernel reports SMT as active; otherwise every
+    # usable CPU is assumed to be a core
+    try:
+        with open("/sys/devices/system/cpu/smt/active") as f:
+            if f.read().strip() == "1":
+                cores = max(1, usable // 2)
+    except OSError:
+        pass
+    return max(cores, min(4, usable))
+
+# Set before numpy/ctranslate2 load so their pools don't oversubscribe
+CPU_THREADS = _cpu_threads()
+os.environ.setdefault("OMP_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
 import sounddevice as sd
 import numpy as np
 import threading
-import queue
 import time
 import logging
 import traceback
-import os
+import collections
+import shutil
+import tempfile
+import ctranslate2
 from faster_whisper import WhisperModel
-import torch 
+from faster_whisper.vad import VadOptions, get_speech_timestamps, get_vad_model
 
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Module logger only; handlers are configured by the application
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 class ContinuousTranscriber:
-    def __init__(self, target_language='en'):
+    def __init__(self, target_language='en', model_size='tiny', compute_type=None):
         self.device = "cpu"
         logger.info(f"Using device: {self.device}")
         
         self.sample_rate = 16000
-        self.buffer = queue.Queue()
         self.running = False
         self.buffer_duration = 2  # seconds
         self.samples_per_chunk = int(self.sample_rate * self.buffer_duration)
+        self.max_batch_windows = 4  # windows merged into one call when behind
+        # Frames per audio callback: 500 ms, a quarter of a transcription window
+        self.blocksize = int(self.sample_rate * 0.5)
+        
+        # Preallocated single-producer/single-consumer ring buffer: only the
+        # audio callback advances _write_pos and only process_audio advances
+        # _read_pos, so no lock is needed. It holds the largest backlog
+        # handled in one call.
+        self.ring_size = self.samples_per_chunk * self.max_batch_windows
+        self._ring = np.zeros(self.ring_size, dtype=np.float32)
+        self._window = np.empty(self.ring_size, dtype=np.float32)  # read-out buffer
+        self._write_pos = 0  # total samples written
+        self._read_pos = 0   # total samples consumed
+        self._data_ready = threading.Condition()  # a full window is buffered
+        
+        # Scratch buffer for |x| when measuring the level of a chunk
+        self._abs_scratch = np.empty(self.ring_size, dtype=np.float32)
         self.callback_function = None
         self.min_audio_level = 0.01
+        # Quiet-chunk gate: low energy and no clear peak means no speech
+        self.min_audio_rms = 0.005
+        self.quiet_peak_level = 0.02
+        
+        # Silero VAD (bundled with faster-whisper), run before Whisper.
+        # 100 ms of padding keeps word edges without re-adding most of the
+        # silence to what the encoder sees.
+        self._vad_options = VadOptions(
+            threshold=0.5,
+            min_speech_duration_ms=250,
+            min_silence_duration_ms=100,
+            speech_pad_ms=100
+        )
+        # Load the (cached) Silero session now rather than on the first chunk
+        get_vad_model()
         self.translation_available = True  # Flag to track if translation works
         
         # Language mapping for translation
@@ -46,42 +104,123 @@ class ContinuousTranscriber:
             'Chinese': 'zh'
         }
         
-        # Validate and set target language
-        self.target_language = self._validate_language(target_language)
-        logger.info(f"Target language set to: {self.target_language}")
+        # Reverse lookups so validation and name formatting are O(1)
+        self._code_to_name = {code: name for name, code in self.available_languages.items()}
+        self._name_to_code = {name.lower(): code for name, code in self.available_languages.items()}
+        
+        self._load_whisper(model_size, compute_type)
+
+        # Initialize translation if needed
+        self.translator = None
+        self.translation_tokenizer = None
+        
+        # Loaded (translator, tokenizer) pairs by language code, so switching
+        # back to a language doesn't reload or reconvert its model
+        self._translator_cache = {}
+        
+        # Decoding options, built once and reused for every translation.
+        # Captions are short, so greedy decoding with a 128-token cap is
+        # enough and halves decoder work compared to beam search.
+        self.translation_max_length = 128
+        self._translate_options = dict(
+            beam_size=1,
+            max_decoding_length=self.translation_max_length
+        )
+        
+        # LRU cache of recent translations; short utterances repeat often
+        self.translation_cache_size = 512
+        self._translation_cache = collections.OrderedDict()
+        
+        self.processing_thread = None
+        self.stream = None
+        
+        self.target_language = 'en'
+        self.set_target_language(target_language)
         
-        # Initialize Faster-Whisper model
+        self._warm_up()
+
+    def _load_whisper(self, model_size, compute_type):
+        """Load the Faster-Whisper model; done once per transcriber"""
         logger.info("Loading Faster-Whisper model...")
         try:
-            model_size = "tiny"
-            compute_type = "int8"
-            
             # Use specific cache directory
             cache_dir = os.path.expanduser("~/.cache/faster-whisper")
             os.makedirs(cache_dir, exist_ok=True)
             
+            compute_type = self._select_compute_type(compute_type)
             self.whisper_model = WhisperModel(
                 model_size,
                 device=self.device,
                 compute_type=compute_type,
-                cpu_threads=4,
+                cpu_threads=CPU_THREADS,
                 num_workers=1,
                 download_root=cache_dir
             )
-            logger.info(f"Faster-Whisper model '{model_size}' loaded successfully")
+            logger.info(f"Faster-Whisper model '{model_size}' ({compute_type}) loaded successfully")
         except Exception as e:
             logger.error(f"Error loading Faster-Whisper model: {str(e)}")
             raise
 
-        # Initialize translation if needed
-        self.translation_model = None
-        self.translation_tokenizer = None
+    def set_target_language(self, language_code):
+        """Switch the translation target, reusing the loaded Whisper model"""
+        language = self._validate_language(language_code)
+        if language == self.target_language and (language == 'en' or self.translator):
+            return
+        
+        # A lingering consumer may still be translating with the old model
+        self._join_processing_thread()
         
-        if self.target_language != 'en':
-            self._setup_translation()
+        self.target_language = language
+        self._translation_cache.clear()
+        logger.info(f"Target language set to: {self.target_language}")
+        
+        if language == 'en':
+            return
+        
+        if language in self._translator_cache:
+            self.translator, self.translation_tokenizer = self._translator_cache[language]
+            self.translation_available = True
+            return
+        
+        self.translator = None
+        self.translation_tokenizer = None
+        self._setup_translation()
+        if self.translator is not None:
+            self._translator_cache[language] = (self.translator, self.translation_tokenizer)
+            # Warm the new translator so its first real sentence isn't slow
+            self._translate_text("hello")
 
-        self.processing_thread = None
-        self.stream = None
+    def _warm_up(self):
+        """Run a dummy transcription so the first utterance doesn't pay for
+        lazy weight paging and kernel setup. Failures here are never fatal."""
+        try:
+            dummy = np.zeros(self.samples_per_chunk, dtype=np.float32)
+            segments, _ = self.whisper_model.transcribe(
+                dummy,
+                language="en",
+                beam_size=1,
+                without_timestamps=True
+            )
+            list(segments)  # segments is lazy; consume it to run the decoder
+            logger.info("Whisper model warmed up")
+        except Exception as e:
+            logger.warning(f"Model warm-up failed: {str(e)}")
+
+    def _select_compute_type(self, requested=None):
+        """Pick a CTranslate2 compute type this CPU actually supports.
+        
+        An explicit request is honoured when supported; otherwise the first
+        supported type from the preference list is used, so int8 kernels
+        never silently fall back to a slow path.
+        """
+        supported = ctranslate2.get_supported_compute_types(self.device)
+        preferred = ("int8", "int8_float32", "float32")
+        if requested:
+            if requested in supported:
+                return requested
+            logger.warning(f"Compute type '{requested}' not supported on this CPU")
+        
+        return next((t for t in preferred if t in supported), "default")
 
     def _setup_translation(self):
         """Setup translation model with proper error handling and dependency checking"""
@@ -101,7 +240,7 @@ class ContinuousTranscriber:
                 logger.error("❌ protobuf not installed! Translation may fail.")
                 logger.error("Please install: pip install protobuf")
             
-            from transformers import MarianMTModel, MarianTokenizer
+            from transformers import MarianTokenizer
             
             # Map target language to appropriate translation model
             translation_models = {
@@ -120,9 +259,24 @@ class ContinuousTranscriber:
             model_name = translation_models.get(self.target_language, "Helsinki-NLP/opus-mt-en-ROMANCE")
             logger.info(f"Loading translation model: {model_name}")
             
+            # Marian is converted once to an int8 CTranslate2 model and cached,
+            # so translation runs in the same engine as Whisper, without torch
+            cache_dir = os.path.expanduser("~/.cache/transcr")
+            ct2_dir = os.path.join(cache_dir, model_name.replace("/", "--") + "-ct2")
+            
             # Load models on CPU with explicit error handling
             try:
-                self.translation_model = MarianMTModel.from_pretrained(model_name)
+                # ct2_dir only ever appears fully written (see below); a
+                # config.json check also rejects partial dirs from older runs
+                if not os.path.isfile(os.path.join(ct2_dir, "config.json")):
+                    self._convert_translation_model(model_name, ct2_dir)
+                
+                self.translator = ctranslate2.Translator(
+                    ct2_dir,
+                    device="cpu",
+                    compute_type=self._select_compute_type("int8"),
+                    intra_threads=CPU_THREADS
+                )
                 self.translation_tokenizer = MarianTokenizer.from_pretrained(model_name)
                 logger.info("✅ Translation model loaded successfully")
                 self.translation_available = True
@@ -131,39 +285,52 @@ class ContinuousTranscriber:
                 if "sentencepiece" in str(e).lower():
                     logger.error("💡 FIX: Run 'pip install sentencepiece'")
                 self.translation_available = False
-                self.translation_model = None
+                self.translator = None
                 
         except ImportError as e:
             logger.error(f"Import error: {e}")
             logger.error("Required packages missing. Run:")
-            logger.error("pip install transformers sentencepiece protobuf torch")
+            logger.error("pip install ctranslate2 transformers sentencepiece protobuf torch")
             self.translation_available = False
-            self.translation_model = None
+            self.translator = None
         except Exception as e:
             logger.error(f"Unexpected error loading translation: {str(e)}")
             logger.error(traceback.format_exc())
             self.translation_available = False
-            self.translation_model = None
+            self.translator = None
+
+    def _convert_translation_model(self, model_name, ct2_dir):
+        """Convert a Marian model to int8 CTranslate2 in a temporary sibling
+        directory and move it into place only once the conversion succeeds"""
+        logger.info(f"Converting {model_name} to CTranslate2 (one-time)...")
+        parent = os.path.dirname(ct2_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(ct2_dir) + ".", dir=parent)
+        try:
+            converter = ctranslate2.converters.TransformersConverter(model_name)
+            converter.convert(tmp_dir, quantization="int8", force=True)
+            # Drop whatever an interrupted conversion left behind
+            shutil.rmtree(ct2_dir, ignore_errors=True)
+            os.replace(tmp_dir, ct2_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
 
     def _validate_language(self, language_code):
         """Validate language code and return normalized version"""
-        if language_code in self.available_languages.values():
+        if language_code in self._code_to_name:
             return language_code
         
-        for name, code in self.available_languages.items():
-            if language_code.lower() == name.lower():
-                return code
+        code = self._name_to_code.get(language_code.lower())
+        if code:
+            return code
         
         logger.warning(f"Invalid language code '{language_code}', defaulting to English")
         return 'en'
 
     def _get_language_name(self, language_code):
         """Get full language name from code"""
-        try:
-            return next(name for name, code in self.available_languages.items()
-                       if code == language_code)
-        except StopIteration:
-            return language_code
+        return self._code_to_name.get(language_code, language_code)
 
     def _translate_text(self, text):
         """Translate text with robust error handling"""
@@ -174,37 +341,42 @@ class ContinuousTranscriber:
             logger.warning("Translation unavailable - missing dependencies")
             return None
             
-        if not self.translation_model or not self.translation_tokenizer:
+        if not self.translator or not self.translation_tokenizer:
             logger.warning("Translation model not loaded")
             return None
+        
+        cache_key = text.strip().lower()
+        cached = self._translation_cache.get(cache_key)
+        if cached is not None:
+            self._translation_cache.move_to_end(cache_key)
+            return cached
             
         try:
-            # Tokenize and translate on CPU
-            inputs = self.translation_tokenizer(
-                text, 
-                return_tensors="pt", 
-                padding=True,
-                truncation=True,
-                max_length=512
+            # Tokenize to Marian's subword pieces and translate on CPU
+            source_tokens = self.translation_tokenizer.convert_ids_to_tokens(
+                self.translation_tokenizer.encode(
+                    text,
+                    truncation=True,
+                    max_length=self.translation_max_length
+                )
             )
             
-            with torch.no_grad():
-                translated_ids = self.translation_model.generate(
-                    **inputs,
-                    max_length=512,
-                    num_beams=2,
-                    length_penalty=0.6,
-                    early_stopping=True,
-                    no_repeat_ngram_size=3
-                )
+            results = self.translator.translate_batch(
+                [source_tokens],
+                **self._translate_options
+            )
             
+            target_tokens = results[0].hypotheses[0]
             translation = self.translation_tokenizer.decode(
-                translated_ids[0], 
+                self.translation_tokenizer.convert_tokens_to_ids(target_tokens),
                 skip_special_tokens=True
             )
             
             if translation:
                 logger.debug(f"✅ Translation successful: '{text[:30]}...' → '{translation[:30]}...'")
+                self._translation_cache[cache_key] = translation
+                if len(self._translation_cache) > self.translation_cache_size:
+                    self._translation_cache.popitem(last=False)
             return translation
             
         except Exception as e:
@@ -217,16 +389,43 @@ class ContinuousTranscriber:
     def process_audio_chunk(self, audio_data):
         """Process audio chunk with Faster-Whisper"""
         try:
-            # Check audio level
-            audio_level = np.max(np.abs(audio_data))
+            # Work on a single contiguous float32 buffer (no copy if already one)
+            audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+            
+            # Check audio level (|x| goes to a reused scratch buffer)
+            n = len(audio_data)
+            if n <= len(self._abs_scratch):
+                scratch = self._abs_scratch[:n]
+            else:
+                scratch = np.empty(n, dtype=np.float32)
+            audio_level = float(np.abs(audio_data, out=scratch).max())
             if audio_level < self.min_audio_level:
-                logger.debug(f"Audio level too low: {audio_level}")
+                logger.debug("Audio level too low: %s", audio_level)
+                return None, None
+            
+            # Energy in a single BLAS pass; skip chunks that are quiet overall
+            rms = float(np.sqrt(np.dot(audio_data, audio_data) / n))
+            if rms < self.min_audio_rms and audio_level < self.quiet_peak_level:
+                logger.debug("Audio RMS too low: %s", rms)
                 return None, None
             
-            # Normalize audio to [-1, 1] range
-            audio_data = audio_data.astype(np.float32)
-            if audio_level > 0:
-                audio_data = audio_data / audio_level
+            # Normalize audio to [-1, 1] range: in place for the ring's own
+            # read-out buffer, on a copy for anything a caller passed in
+            scale = 1.0 / audio_level
+            if np.may_share_memory(audio_data, self._window):
+                np.multiply(audio_data, scale, out=audio_data)
+            else:
+                audio_data = audio_data * scale
+            
+            # Skip Whisper entirely when the VAD finds no speech, otherwise
+            # pass it only the voiced segments
+            speech_timestamps = get_speech_timestamps(audio_data, self._vad_options)
+            if not speech_timestamps:
+                logger.debug("No speech detected by VAD")
+                return None, None
+            audio_data = np.concatenate(
+                [audio_data[ts["start"]:ts["end"]] for ts in speech_timestamps]
+            )
             
             # Transcribe with Faster-Whisper
             logger.debug("Starting transcription with Faster-Whisper")
@@ -238,24 +437,13 @@ class ContinuousTranscriber:
                 beam_size=1,
                 best_of=1,
                 temperature=0.0,
-                vad_filter=True,
-                vad_parameters=dict(
-                    threshold=0.5,
-                    min_speech_duration_ms=250,
-                    min_silence_duration_ms=100,
-                    speech_pad_ms=400
-                ),
+                vad_filter=False,
                 without_timestamps=True,
                 condition_on_previous_text=False
             )
             
-            # Collect all segments
-            transcription_parts = []
-            for segment in segments:
-                transcription_parts.append(segment.text)
-                logger.debug(f"Segment: {segment.text[:50]}...")
-            
-            transcription = " ".join(transcription_parts).strip()
+            # Collect all segments (consuming the generator runs the decoder)
+            transcription = " ".join(segment.text for segment in segments).strip()
             
             if not transcription:
                 logger.debug("No transcription generated")
@@ -288,11 +476,69 @@ class ContinuousTranscriber:
             logger.warning(f"Audio status: {status}")
         
         try:
-            audio_data = indata.mean(axis=1) if indata.ndim > 1 else indata.flatten()
-            self.buffer.put(audio_data.copy())
+            # The stream is mono: hand the ring a view, it copies the samples
+            self._write_ring(indata[:, 0])
+            if self._available() >= self.samples_per_chunk:
+                with self._data_ready:
+                    self._data_ready.notify()
         except Exception as e:
             logger.error(f"Error in audio callback: {str(e)}")
     
+    def _write_ring(self, samples):
+        """Append samples to the ring (producer side), overwriting the oldest
+        audio if the reader has fallen a full ring behind"""
+        n = len(samples)
+        write_pos = self._write_pos
+        if n > self.ring_size:
+            samples = samples[-self.ring_size:]
+            write_pos += n - self.ring_size
+            n = self.ring_size
+        
+        start = write_pos % self.ring_size
+        first = min(n, self.ring_size - start)
+        self._ring[start:start + first] = samples[:first]
+        self._ring[:n - first] = samples[first:]
+        # Publish only after the samples are in place
+        self._write_pos = write_pos + n
+    
+    def _available(self):
+        """Number of captured samples not yet consumed"""
+        return self._write_pos - self._read_pos
+    
+    def _read_ring(self, min_samples):
+        """Copy all unread samples, up to one block short of a full ring,
+        into the read-out buffer (consumer side).
+        
+        Returns a view of the read-out buffer, or None if fewer than
+        min_samples are available or the writer overwrote all of them.
+        """
+        write_pos = self._write_pos
+        read_pos = self._read_pos
+        n = write_pos - read_pos
+        if n < min_samples:
+            return None
+        
+        # Writer lapped us (or is about to): skip the oldest audio, leaving
+        # one block of headroom for the write that may be in progress
+        limit = self.ring_size - self.blocksize
+        if n > limit:
+            read_pos = write_pos - limit
+            n = limit
+        
+        start = read_pos % self.ring_size
+        first = min(n, self.ring_size - start)
+        self._window[:first] = self._ring[start:start + first]
+        self._window[first:n] = self._ring[:n - first]
+        self._read_pos = read_pos + n
+        
+        # numpy drops the GIL for large copies, so the writer may have run
+        # meanwhile; discard samples it could have overwritten (including
+        # its next, not yet published, block) before they were copied
+        torn = self._write_pos + self.blocksize - self.ring_size - read_pos
+        if torn >= n:
+            return None
+        return self._window[max(0, torn):n]
+    
     def process_audio(self):
         """Main audio processing loop"""
         logger.info("Starting audio processing loop")
@@ -300,33 +546,23 @@ class ContinuousTranscriber:
         
         while self.running:
             try:
-                # Collect audio chunks
-                audio_chunks = []
-                current_size = 0
-                start_time = time.time()
-                
-                while current_size < self.samples_per_chunk and self.running:
-                    try:
-                        chunk = self.buffer.get(timeout=0.1)
-                        audio_chunks.append(chunk)
-                        current_size += len(chunk)
-                        
-                        if time.time() - start_time > self.buffer_duration * 1.5:
-                            logger.debug("Buffer collection timeout - no speech detected")
-                            break
-                            
-                    except queue.Empty:
-                        continue
+                # Sleep until a full window has been captured (or we're stopped)
+                with self._data_ready:
+                    self._data_ready.wait_for(
+                        lambda: (not self.running
+                                 or self._available() >= self.samples_per_chunk),
+                        timeout=self.buffer_duration * 1.5
+                    )
                 
                 if not self.running:
                     break
-                    
-                if not audio_chunks:
-                    continue
                 
-                audio_data = np.concatenate(audio_chunks)
-                if len(audio_data) > self.samples_per_chunk:
-                    audio_data = audio_data[:self.samples_per_chunk]
+                # Everything captured so far is read in one go: if transcription
+                # fell behind, the backlog (up to max_batch_windows) is folded
+                # into this call, since Whisper pads every input to 30 s anyway
+                audio_data = self._read_ring(self.samples_per_chunk)
+                if audio_data is None:
+                    continue
                 
                 transcription, translation = self.process_audio_chunk(audio_data)
                 
@@ -355,6 +591,12 @@ class ContinuousTranscriber:
             logger.warning("Transcription already running")
             return
         
+        # The ring supports only one consumer
+        self._join_processing_thread()
+        
+        # Discard audio captured but not processed during the previous run
+        self._read_pos = self._write_pos
+        
         self.running = True
         logger.info("Starting transcription")
         
@@ -363,7 +605,7 @@ class ContinuousTranscriber:
                 callback=self.audio_callback,
                 channels=1,
                 samplerate=self.sample_rate,
-                blocksize=int(self.sample_rate * 0.1),
+                blocksize=self.blocksize,
                 dtype='float32'
             )
             self.stream.start()
@@ -380,10 +622,22 @@ class ContinuousTranscriber:
             logger.error(traceback.format_exc())
             raise
     
+    def _join_processing_thread(self):
+        """Wait for a processing thread left over from a stopped run, which
+        may still be finishing a chunk, to exit"""
+        if self.running:
+            # The live loop never exits on its own; joining it would hang
+            raise RuntimeError("Stop transcription before switching models")
+        if self.processing_thread:
+            self.processing_thread.join()
+            self.processing_thread = None
+    
     def stop_transcription(self):
         """Stop the transcription process"""
         logger.info("Stopping transcription")
         self.running = False
+        with self._data_ready:
+            self._data_ready.notify_all()
         
         try:
             if self.stream:
@@ -394,13 +648,9 @@ class ContinuousTranscriber:
             
             if self.processing_thread:
                 self.processing_thread.join(timeout=2.0)
-                self.processing_thread = None
-            
-            while not self.buffer.empty():
-                try:
-                    self.buffer.get_nowait()
-                except queue.Empty:
-                    break
+                # Keep a busy thread so the next start can wait for it
+                if not self.processing_thread.is_alive():
+                    self.processing_thread = None
             
             logger.info("Transcription stopped successfully")
             